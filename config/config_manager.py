@@ -1,13 +1,121 @@
 import configparser
+import threading
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
+DEFAULT_CONFIG_FILE: Path = Path(__file__).resolve().parent / "config.ini"
+
+DEFAULT_CONFIG: Dict[str, Dict[str, str]] = {
+    'API': {'base_url': 'https://text.pollinations.ai',
+            'endpoint': '/openai', 'timeout': '30', 'max_retries': '3',
+            'max_workers': '2', 'keepalive_interval': '60',
+            'context_token_budget': '3000'},
+    'APP': {'window_width': '900', 'window_height': '700', 'theme': 'native', 'max_history': '100',
+            'ui_monitor': 'false', 'ui_lag_threshold_ms': '100'},
+    'SECURITY': {'validate_ssl': 'true', 'rate_limit': '10'},
+}
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable, validated view of the configuration with typed fields."""
+
+    base_url: str
+    endpoint: str
+    timeout: int
+    max_retries: int
+    max_workers: int
+    keepalive_interval: int
+    context_token_budget: int
+    window_width: int
+    window_height: int
+    theme: str
+    max_history: int
+    ui_monitor: bool
+    ui_lag_threshold_ms: int
+    validate_ssl: bool
+    rate_limit: int
+
+    @property
+    def url(self) -> str:
+        """The full API URL."""
+        return f"{self.base_url}{self.endpoint}"
+
+    @property
+    def min_interval(self) -> float:
+        """Minimum seconds between requests derived from rate_limit."""
+        return 60 / self.rate_limit if self.rate_limit > 0 else 0
+
+    @classmethod
+    def from_parser(cls, parser: configparser.ConfigParser) -> "ConfigSnapshot":
+        """Builds a snapshot, replacing invalid or out-of-range values with defaults."""
+
+        def text(section: str, key: str) -> str:
+            value = parser.get(section, key, fallback='').strip()
+            return value or DEFAULT_CONFIG[section][key]
+
+        def integer(section: str, key: str, minimum: int) -> int:
+            default = int(DEFAULT_CONFIG[section][key])
+            try:
+                value = parser.getint(section, key, fallback=default)
+            except ValueError:
+                logging.warning(
+                    f"Invalid integer for [{section}] {key}, using {default}")
+                return default
+            if value < minimum:
+                logging.warning(
+                    f"[{section}] {key}={value} is below {minimum}, using {default}")
+                return default
+            return value
+
+        def boolean(section: str, key: str) -> bool:
+            default = DEFAULT_CONFIG[section][key] == 'true'
+            try:
+                return parser.getboolean(section, key, fallback=default)
+            except ValueError:
+                logging.warning(
+                    f"Invalid boolean for [{section}] {key}, using {default}")
+                return default
+
+        return cls(
+            base_url=text('API', 'base_url').rstrip('/'),
+            endpoint=text('API', 'endpoint'),
+            timeout=integer('API', 'timeout', 1),
+            max_retries=integer('API', 'max_retries', 1),
+            max_workers=integer('API', 'max_workers', 1),
+            keepalive_interval=integer('API', 'keepalive_interval', 0),
+            context_token_budget=integer('API', 'context_token_budget', 256),
+            window_width=integer('APP', 'window_width', 1),
+            window_height=integer('APP', 'window_height', 1),
+            theme=text('APP', 'theme'),
+            max_history=integer('APP', 'max_history', 1),
+            ui_monitor=boolean('APP', 'ui_monitor'),
+            ui_lag_threshold_ms=integer('APP', 'ui_lag_threshold_ms', 1),
+            validate_ssl=boolean('SECURITY', 'validate_ssl'),
+            rate_limit=integer('SECURITY', 'rate_limit', 0),
+        )
+
+
 class ConfigManager:
     """Manages the application's configuration with secure default values."""
 
-    def __init__(self, config_file: str = "config.ini") -> None:
-        self.config_file: Path = Path(config_file)
+    def __init__(self, config_file: Optional[str] = None) -> None:
+        """Initializes the configuration manager.
+
+        Args:
+            config_file: Path to the config file. Defaults to config.ini next to
+                this module, independent of the current working directory.
+        """
+        self.config_file: Path = Path(config_file) if config_file else DEFAULT_CONFIG_FILE
         self.config: configparser.ConfigParser = configparser.ConfigParser()
+        self.snapshot: ConfigSnapshot = ConfigSnapshot.from_parser(self.config)
+        self._subscribers: List[Callable[[ConfigSnapshot], None]] = []
+        self._lock = threading.Lock()
+        self._watch_stop = threading.Event()
+        self._watch_thread: Optional[threading.Thread] = None
+        self._file_state: Optional[Tuple[float, int]] = None
         self.load_config()
 
     def load_config(self) -> None:
@@ -20,14 +128,13 @@ class ConfigManager:
                 self._create_default_config()
         else:
             self._create_default_config()
+        self._file_state = self._current_state()
+        self.snapshot = ConfigSnapshot.from_parser(self.config)
 
     def _create_default_config(self) -> None:
         """Creates a default configuration file with predefined settings."""
-        self.config['API'] = {'base_url': 'https://text.pollinations.ai',
-                              'endpoint': '/openai', 'timeout': '30', 'max_retries': '3'}
-        self.config['APP'] = {
-            'window_width': '900', 'window_height': '700', 'theme': 'native', 'max_history': '100'}
-        self.config['SECURITY'] = {'validate_ssl': 'true', 'rate_limit': '10'}
+        for section, values in DEFAULT_CONFIG.items():
+            self.config[section] = dict(values)
         self.save_config()
 
     def save_config(self) -> None:
@@ -49,3 +156,113 @@ class ConfigManager:
     def getboolean(self, section: str, key: str, fallback: bool = False) -> bool:
         """Gets a boolean value from the config."""
         return self.config.getboolean(section, key, fallback=fallback)
+
+    def subscribe(self, callback: Callable[[ConfigSnapshot], None]) -> None:
+        """Registers a callback that receives every new snapshot.
+
+        Callbacks run on the watcher thread; UI code must hand off to its own thread.
+        """
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[ConfigSnapshot], None]) -> None:
+        """Removes a previously registered callback."""
+        with self._lock:
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+    def _current_state(self) -> Optional[Tuple[float, int]]:
+        """Returns the config file's (mtime, size), or None if it cannot be read."""
+        try:
+            stat = self.config_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+    def _read_snapshot(self) -> Optional[Tuple[configparser.ConfigParser, ConfigSnapshot]]:
+        """Parses the config file, or returns None if it is unreadable or incomplete."""
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(self.config_file, encoding='utf-8')
+            snapshot = ConfigSnapshot.from_parser(parser)
+        except (configparser.Error, OSError) as e:
+            logging.error(f"Error reloading config, keeping previous values: {e}")
+            return None
+        missing = [section for section in DEFAULT_CONFIG if not parser.has_section(section)]
+        if missing:
+            logging.warning(
+                f"Config file is missing sections {', '.join(missing)}, keeping previous values")
+            return None
+        return parser, snapshot
+
+    def _publish(self, parser: configparser.ConfigParser, snapshot: ConfigSnapshot) -> bool:
+        """Installs a snapshot and notifies subscribers if it differs from the current one."""
+        if snapshot == self.snapshot:
+            return False
+        self.config = parser
+        self.snapshot = snapshot
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logging.error(f"Error applying config update: {e}")
+        logging.info(f"Configuration reloaded from {self.config_file}")
+        return True
+
+    def reload(self) -> bool:
+        """Re-reads the config file and publishes a new snapshot if it changed.
+
+        A file that fails to parse or lacks any of the expected sections (for
+        example while an editor is rewriting it) keeps the current snapshot.
+
+        Returns:
+            True if a new snapshot was published, False otherwise.
+        """
+        result = self._read_snapshot()
+        if result is None:
+            return False
+        return self._publish(*result)
+
+    def start_watching(self, interval: float = 2.0) -> None:
+        """Starts a background thread that reloads the config when the file changes."""
+        if self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="ConfigWatcher", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self) -> None:
+        """Stops the config watcher thread."""
+        self._watch_stop.set()
+        self._watch_thread = None
+
+    def _watch_loop(self, interval: float) -> None:
+        """Polls the config file and reloads it once a change has settled.
+
+        A change is only read after the file's (mtime, size) stays the same
+        across two polls, so a file an editor is still writing is not
+        published. The applied state is recorded only after a successful read,
+        so a rejected file is retried even if the finished write keeps the
+        same mtime.
+        """
+        pending: Optional[Tuple[float, int]] = None
+        rejected: Optional[Tuple[float, int]] = None
+        while not self._watch_stop.wait(interval):
+            state = self._current_state()
+            if state is None or state == self._file_state or state == rejected:
+                pending = None
+                continue
+            if state != pending:
+                pending = state
+                continue
+            result = self._read_snapshot()
+            if result is None:
+                rejected = state
+                continue
+            rejected = None
+            self._file_state = state
+            pending = None
+            self._publish(*result)
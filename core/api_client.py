@@ -1,10 +1,17 @@
 import requests
 import json
+import math
 import time
 import logging
+import threading
 from typing import Optional, Dict, Any
 
-from config.config_manager import ConfigManager
+from config.config_manager import ConfigManager, ConfigSnapshot
+from core.context import ConversationContext, estimate_message_tokens, estimate_tokens
+from core.connection import TimedHTTPAdapter, reset_connect_time, get_connect_time, get_new_connections
+
+DEFAULT_GENERATION_PARAMS: Dict[str, Any] = {
+    "model": "gpt-4", "max_tokens": 1200, "temperature": 0.7}
 
 class SecureAPIClient:
     """Secure API client that uses an externally loaded set of prompts."""
@@ -20,17 +27,45 @@ class SecureAPIClient:
         self.config = config
         self.logger = logger
         self.prompts_data = prompts_data
-        self.base_url: str = config.get('API', 'base_url')
-        self.endpoint: str = config.get('API', 'endpoint')
-        self.timeout: int = config.getint('API', 'timeout', 30)
-        self.max_retries: int = config.getint('API', 'max_retries', 3)
-        self.validate_ssl: bool = config.getboolean('SECURITY', 'validate_ssl', True)
         self.last_request_time: float = 0
-        self.rate_limit: int = config.getint('SECURITY', 'rate_limit', 10)
-        self.min_interval: float = 60 / self.rate_limit if self.rate_limit > 0 else 0
+        self.last_activity: float = 0
+        self.max_workers: int = 0
+        self._auth_headers: Dict[str, Dict[str, str]] = {}
+        self._system_prompts: Dict[str, str] = {}
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
         self.session: requests.Session = requests.Session()
         self.session.headers.update(
             {'Content-Type': 'application/json', 'User-Agent': 'PollinationsPromptEnhancer/2.5.0'})
+        self.apply_config(config.snapshot)
+        config.subscribe(self.apply_config)
+
+    def apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """Applies a configuration snapshot; safe to call while requests are running.
+
+        Timeouts, retries and the rate limit take effect on the next request.
+        A change of max_workers mounts a new connection pool of that size.
+        """
+        self.base_url = snapshot.base_url
+        self.endpoint = snapshot.endpoint
+        self.timeout = snapshot.timeout
+        self.max_retries = snapshot.max_retries
+        self.validate_ssl = snapshot.validate_ssl
+        self.rate_limit = snapshot.rate_limit
+        self.min_interval = snapshot.min_interval
+        self.keepalive_interval = snapshot.keepalive_interval
+        self.context_token_budget = snapshot.context_token_budget
+        if snapshot.max_workers != self.max_workers:
+            old_adapter = self.session.adapters.get('https://')
+            adapter = TimedHTTPAdapter(
+                pool_connections=1, pool_maxsize=snapshot.max_workers)
+            self.session.mount('https://', adapter)
+            self.session.mount('http://', adapter)
+            if self.max_workers and old_adapter is not None:
+                old_adapter.close()
+                self.logger.info(
+                    f"Connection pool resized: {self.max_workers} -> {snapshot.max_workers}")
+            self.max_workers = snapshot.max_workers
 
     def _validate_input(self, prompt: str) -> bool:
         """Validates the user's input.
@@ -62,13 +97,16 @@ class SecureAPIClient:
             time.sleep(sleep_time)
         self.last_request_time = time.time()
 
-    def enhance_prompt(self, prompt: str, api_token: str, prompt_type: str) -> Dict[str, Any]:
+    def enhance_prompt(self, prompt: str, api_token: str, prompt_type: str,
+                       context: Optional[ConversationContext] = None) -> Dict[str, Any]:
         """Enhances the user's prompt using the Pollinations.ai API.
 
         Args:
             prompt: The user's prompt.
             api_token: The user's API token.
             prompt_type: The type of prompt to enhance.
+            context: Optional conversation for refinement rounds. Previous turns
+                are sent as model context and the new round is added on success.
 
         Returns:
             A dictionary with the enhanced prompt or an error message.
@@ -84,24 +122,41 @@ class SecureAPIClient:
         if not system_prompt:
             return {'success': False, 'error': f"Prompt type '{prompt_type}' not found.", 'enhanced_prompt': None}
 
+        params = self._get_generation_params(prompt_type)
         url = f"{self.base_url}{self.endpoint}"
-        headers = {'Authorization': f'Bearer {api_token.strip()}', **
-                   self.session.headers}
-        payload = {"model": "gpt-4", "messages": [{"role": "system", "content": system_prompt}, {
-            "role": "user", "content": prompt.strip()}], "max_tokens": 1200, "temperature": 0.7}
+        headers = self._get_auth_headers(api_token)
+        if context is not None:
+            messages, generation = context.pack(system_prompt, prompt.strip())
+            self.logger.info(
+                f"Refinement context for '{prompt_type}': {len(messages)} messages, "
+                f"~{estimate_message_tokens(messages)} tokens (budget {context.token_budget})")
+        else:
+            messages = [{"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt.strip()}]
+        payload = {"model": params['model'], "messages": messages,
+                   "max_tokens": params['max_tokens'], "temperature": params['temperature']}
 
         for attempt in range(self.max_retries):
             try:
                 self.logger.info(
                     f"Making API request for type '{prompt_type}' (attempt {attempt + 1}/{self.max_retries})")
+                reset_connect_time()
                 response = self.session.post(
-                    url, headers=headers, json=payload, timeout=self.timeout, verify=self.validate_ssl)
+                    url, headers=headers, json=payload, timeout=params['timeout'], verify=self.validate_ssl)
+                self.last_activity = time.monotonic()
+                self._log_request_timing(prompt_type, response)
                 response.raise_for_status()
                 data = response.json()
                 enhanced_prompt = data.get('choices', [{}])[0].get(
                     'message', {}).get('content', '').strip()
                 if not enhanced_prompt:
                     return {'success': False, 'error': 'API returned an empty response.', 'enhanced_prompt': None}
+                self._log_completion_usage(
+                    prompt_type, data, enhanced_prompt, params['max_tokens'])
+                if context is not None and not context.add_turn(
+                        messages[-1]['content'], enhanced_prompt, generation):
+                    self.logger.info(
+                        f"Refinement context for '{prompt_type}' was cleared during the request; round not kept")
                 self.logger.info(
                     f"Prompt type '{prompt_type}' enhanced successfully")
                 return {'success': True, 'error': None, 'enhanced_prompt': enhanced_prompt}
@@ -109,7 +164,7 @@ class SecureAPIClient:
                 self.logger.error(
                     f"HTTP Error: {e.response.status_code} - {e.response.text}")
                 if e.response.status_code == 401:
-                    return {'success': False, 'error': 'Authentication failed. Check your API_TOKEN.', 'enhanced_prompt': None}
+                    return {'success': False, 'error': 'Authentication failed. Check your API_TOKEN.', 'enhanced_prompt': None, 'status_code': 401}
                 if e.response.status_code == 429:
                     if attempt < self.max_retries - 1:
                         time.sleep(2 ** attempt)
@@ -123,10 +178,17 @@ class SecureAPIClient:
             except (json.JSONDecodeError, KeyError, IndexError) as e:
                 self.logger.error(f"Error processing response: {e}")
                 return {'success': False, 'error': 'Invalid response format from API.', 'enhanced_prompt': None}
-        return {'success': False, 'error': f'Failed after {self.max_retries} attempts.', 'enhanced_prompt': None}
+        return {'success': False, 'error': f'Failed after {self.max_retries} attempts.', 'enhanced_prompt': None, 'status_code': 429}
 
     def _get_system_prompt(self, prompt_type: str) -> Optional[str]:
-        """Constructs the system prompt from the loaded data."""
+        """Returns the system prompt for a type, built once from the loaded data.
+
+        Reusing the same string keeps the message prefix identical across
+        requests and refinement rounds.
+        """
+        cached = self._system_prompts.get(prompt_type)
+        if cached is not None:
+            return cached
         prompt_info = self.prompts_data.get(prompt_type)
         if not prompt_info:
             return None
@@ -137,8 +199,159 @@ class SecureAPIClient:
         formatted_guidelines = "\n".join(f"- {line}" for line in guidelines)
 
         final_prompt = f"{description}\n\nGuidelines:{formatted_guidelines}\n\nTransform the following user prompt:"
+        self._system_prompts[prompt_type] = final_prompt
         return final_prompt
 
+    def _get_auth_headers(self, api_token: str) -> Dict[str, str]:
+        """Returns the per-request headers for a token, built once and cached.
+
+        The session already sends its default headers, so only the
+        Authorization header needs to be passed per request.
+        """
+        headers = self._auth_headers.get(api_token)
+        if headers is None:
+            headers = {'Authorization': f'Bearer {api_token.strip()}'}
+            self._auth_headers[api_token] = headers
+        return headers
+
+    def _log_request_timing(self, prompt_type: str, response: requests.Response) -> None:
+        """Logs connection setup time separately from the server response time."""
+        connect_time = get_connect_time()
+        server_time = max(0.0, response.elapsed.total_seconds() - connect_time)
+        self.logger.info(
+            f"Request timing for '{prompt_type}': connect={connect_time * 1000:.0f}ms "
+            f"({get_new_connections()} new) server={server_time * 1000:.0f}ms")
+
+    def warm_up(self) -> bool:
+        """Opens a connection to the API host ahead of the first request.
+
+        Pays for DNS, TCP and the TLS handshake up front so the first
+        enhancement only waits for generation time.
+
+        Returns:
+            True if the host was reached, False otherwise.
+        """
+        reset_connect_time()
+        try:
+            self.session.head(self.base_url, timeout=self.timeout,
+                              verify=self.validate_ssl, allow_redirects=False)
+        except requests.exceptions.RequestException as e:
+            self.logger.warning(f"Connection warm-up failed: {e}")
+            return False
+        self.last_activity = time.monotonic()
+        self.logger.info(
+            f"Connection warm-up done: connect={get_connect_time() * 1000:.0f}ms")
+        return True
+
+    def start_keepalive(self) -> None:
+        """Starts a background thread that keeps the pooled connection fresh.
+
+        When the session has been idle for keepalive_interval seconds a light
+        HEAD request is sent so the next enhancement does not hit a stale
+        connection. A non-positive interval disables it.
+        """
+        if self.keepalive_interval <= 0 or self._keepalive_thread is not None:
+            return
+        self._keepalive_stop.clear()
+        self._keepalive_thread = threading.Thread(
+            target=self._keepalive_loop, name="PromptEnhancer-keepalive", daemon=True)
+        self._keepalive_thread.start()
+
+    def stop_keepalive(self) -> None:
+        """Stops the keep-alive thread if it is running."""
+        self._keepalive_stop.set()
+        self._keepalive_thread = None
+
+    def _keepalive_loop(self) -> None:
+        """Pings the API host whenever the session has been idle too long.
+
+        Sleeps until the idle time reaches keepalive_interval, measured from
+        the last activity, so the ping is not pushed back by a full interval.
+        """
+        delay = max(1, self.keepalive_interval)
+        while not self._keepalive_stop.wait(delay):
+            idle = time.monotonic() - self.last_activity
+            if self.keepalive_interval <= 0:
+                delay = 1
+                continue
+            if idle < self.keepalive_interval:
+                delay = max(1, self.keepalive_interval - idle)
+                continue
+            reset_connect_time()
+            try:
+                self.session.head(self.base_url, timeout=self.timeout,
+                                  verify=self.validate_ssl, allow_redirects=False)
+                self.last_activity = time.monotonic()
+                if get_new_connections():
+                    self.logger.info(
+                        f"Keep-alive: stale connection replaced after {idle:.0f}s idle "
+                        f"(connect={get_connect_time() * 1000:.0f}ms)")
+            except requests.exceptions.RequestException as e:
+                self.logger.debug(f"Keep-alive ping failed: {e}")
+            delay = max(1, self.keepalive_interval)
+
+    def _get_generation_params(self, prompt_type: str) -> Dict[str, Any]:
+        """Resolves the model and generation parameters for a prompt type.
+
+        Values declared under the category's "parameters" key in prompts.json
+        override the defaults; the timeout falls back to the [API] setting.
+        """
+        params = {**DEFAULT_GENERATION_PARAMS, 'timeout': self.timeout}
+        prompt_info = self.prompts_data.get(prompt_type) or {}
+        overrides = prompt_info.get("parameters") or {}
+        for key in ('model', 'max_tokens', 'temperature', 'timeout'):
+            if key not in overrides:
+                continue
+            value = self._coerce_generation_param(key, overrides[key])
+            if value is None:
+                self.logger.warning(
+                    f"Ignoring invalid '{key}' for prompt type '{prompt_type}': {overrides[key]!r}")
+                continue
+            if key != 'model' and (value < 0 or (value == 0 and key != 'temperature')):
+                self.logger.warning(
+                    f"Ignoring out-of-range '{key}' for prompt type '{prompt_type}': {value}")
+                continue
+            params[key] = value
+        return params
+
+    @staticmethod
+    def _coerce_generation_param(key: str, raw: Any) -> Any:
+        """Converts a prompts.json parameter to its expected type, or returns None if invalid.
+
+        The model must be a non-empty string and max_tokens a whole number;
+        booleans are never accepted as numbers.
+        """
+        if key == 'model':
+            return raw.strip() if isinstance(raw, str) and raw.strip() else None
+        if isinstance(raw, bool):
+            return None
+        if key == 'max_tokens':
+            if isinstance(raw, int):
+                return raw
+            if isinstance(raw, float) and raw.is_integer():
+                return int(raw)
+            return None
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            return None
+        return value if math.isfinite(value) else None
+
+    def _log_completion_usage(self, prompt_type: str, data: Dict[str, Any], content: str, max_tokens: int) -> None:
+        """Logs the completion size so max_tokens can be tuned per category.
+
+        Uses the token count reported by the API when available and falls
+        back to the local estimate from core.context.
+        """
+        usage = data.get('usage') or {}
+        completion_tokens = usage.get('completion_tokens')
+        if not isinstance(completion_tokens, int):
+            completion_tokens = max(1, estimate_tokens(content))
+        self.logger.info(
+            f"Completion usage for '{prompt_type}': {completion_tokens} tokens (max_tokens={max_tokens})")
+
     def __del__(self) -> None:
+        if hasattr(self, '_keepalive_stop'):
+            self._keepalive_stop.set()
         if hasattr(self, 'session'):
             self.session.close()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Bulk prompt enhancement across a pool of API tokens.
+
+Each token is owned by its own worker process with a dedicated SecureAPIClient,
+so every worker has its own rate limiter and connection pool. Workers pull jobs
+from a shared queue, which rebalances the load automatically: a throttled token
+backs off while the others keep consuming, and a token rejected with 401 is
+retired and its job handed back to the pool. Results are merged in input order.
+
+Usage:
+    python -m core.bulk_runner input.jsonl output.jsonl [--type General]
+
+Each input line is either a JSON object {"prompt": ..., "type": ...} or plain
+text (enhanced with --type). Tokens are read from API_TOKENS (comma separated)
+in the .env file, falling back to API_TOKEN.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config_manager import ConfigManager
+from utils.logger import Logger
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# Job: (index, prompt, prompt_type, requeue_count)
+Job = Tuple[int, str, str, int]
+
+
+def _worker_main(worker_id: int, api_token: str, config_file: Optional[str], prompts_data: Dict,
+                 jobs: "multiprocessing.Queue", results: "multiprocessing.Queue",
+                 throttle_cooldown: float, max_requeues: int) -> None:
+    """Worker process loop; owns one token and one API client."""
+    from core.api_client import SecureAPIClient
+
+    logger = Logger.setup_logger("PromptEnhancerBulk")
+    client = SecureAPIClient(ConfigManager(config_file), logger, prompts_data)
+    client.warm_up()
+    try:
+        while True:
+            job = jobs.get()
+            if job is None:
+                break
+            index, prompt, prompt_type, requeues = job
+            results.put(('started', worker_id, index))
+            try:
+                result = client.enhance_prompt(prompt, api_token, prompt_type)
+            except Exception as e:
+                logger.error(
+                    f"Bulk worker {worker_id}: unexpected error on job {index}: {e}", exc_info=True)
+                result = {'success': False, 'error': f'Unexpected error: {e}', 'enhanced_prompt': None}
+            status_code = result.get('status_code')
+            if status_code == 401:
+                logger.warning(
+                    f"Bulk worker {worker_id}: token rejected (401), retiring and requeuing job {index}")
+                jobs.put(job)
+                results.put(('retired', worker_id, None))
+                return
+            if status_code == 429 and requeues < max_requeues:
+                logger.warning(
+                    f"Bulk worker {worker_id}: token throttled, requeuing job {index} and cooling down {throttle_cooldown:.1f}s")
+                jobs.put((index, prompt, prompt_type, requeues + 1))
+                results.put(('requeued', worker_id, index))
+                time.sleep(throttle_cooldown)
+                continue
+            result['worker'] = worker_id
+            results.put(('result', index, result))
+    finally:
+        client.session.close()
+
+
+class BulkRunner:
+    """Fans prompt enhancement jobs out to one worker process per API token."""
+
+    def __init__(self, api_tokens: List[str], prompts_data: Dict, config_file: Optional[str] = None,
+                 throttle_cooldown: float = 10.0, max_requeues: int = 5) -> None:
+        """Initializes the bulk runner.
+
+        Args:
+            api_tokens: The pool of API tokens; one worker is started per token.
+            prompts_data: The data for the prompts.
+            config_file: Path to config.ini; defaults to the project's config.
+            throttle_cooldown: Seconds a throttled worker pauses before pulling new work.
+            max_requeues: How many times a throttled job may be requeued before failing.
+        """
+        tokens = [t.strip() for t in api_tokens if t and t.strip()]
+        if not tokens:
+            raise ValueError("At least one API token is required.")
+        self.api_tokens = list(dict.fromkeys(tokens))
+        self.prompts_data = prompts_data
+        self.config_file = config_file
+        self.throttle_cooldown = throttle_cooldown
+        self.max_requeues = max_requeues
+        self.logger = Logger.setup_logger("PromptEnhancerBulk")
+
+    def run(self, items: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Enhances every (prompt, prompt_type) item and returns results in input order."""
+        if not items:
+            return []
+        ctx = multiprocessing.get_context("spawn")
+        jobs = ctx.Queue()
+        results = ctx.Queue()
+        for index, (prompt, prompt_type) in enumerate(items):
+            jobs.put((index, prompt, prompt_type, 0))
+
+        workers = []
+        for worker_id, token in enumerate(self.api_tokens):
+            process = ctx.Process(
+                target=_worker_main, name=f"PromptEnhancerBulk-{worker_id}",
+                args=(worker_id, token, self.config_file, self.prompts_data, jobs, results,
+                      self.throttle_cooldown, self.max_requeues),
+                daemon=True)
+            process.start()
+            workers.append(process)
+        self.logger.info(
+            f"Bulk run started: {len(items)} jobs across {len(workers)} tokens")
+
+        merged: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        remaining = len(items)
+        active = set(range(len(workers)))
+        # Job index each worker is currently processing, if any.
+        in_flight: Dict[int, int] = {}
+        try:
+            while remaining and active:
+                try:
+                    kind, key, payload = results.get(timeout=1.0)
+                except queue.Empty:
+                    for worker_id in [w for w in active if not workers[w].is_alive()]:
+                        active.discard(worker_id)
+                        index = in_flight.pop(worker_id, None)
+                        if index is not None and merged[index] is None:
+                            self.logger.error(
+                                f"Bulk worker {worker_id} died while processing job {index}")
+                            merged[index] = {'success': False, 'error': 'Worker process died while processing this prompt.',
+                                             'enhanced_prompt': None}
+                            remaining -= 1
+                    # A worker killed between taking a job and reporting it loses
+                    # the job silently; with nothing in flight and nothing queued,
+                    # the outstanding results can never arrive.
+                    if remaining and not in_flight and jobs.empty():
+                        self.logger.error(
+                            f"Bulk run: {remaining} jobs lost with no worker holding them")
+                        for index, result in enumerate(merged):
+                            if result is None:
+                                merged[index] = {'success': False, 'error': 'Job was lost when a worker process died.',
+                                                 'enhanced_prompt': None}
+                        remaining = 0
+                    continue
+                if kind == 'started':
+                    in_flight[key] = payload
+                    continue
+                if kind in ('requeued', 'retired'):
+                    in_flight.pop(key, None)
+                    if kind == 'retired':
+                        active.discard(key)
+                    continue
+                worker_id = payload.get('worker')
+                if in_flight.get(worker_id) == key:
+                    del in_flight[worker_id]
+                if merged[key] is None:
+                    remaining -= 1
+                merged[key] = payload
+            if remaining:
+                self.logger.error(
+                    f"Bulk run: no usable tokens left, {remaining} jobs not processed")
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+
+        return [result if result is not None else
+                {'success': False, 'error': 'No usable API token left to process this prompt.', 'enhanced_prompt': None}
+                for result in merged]
+
+
+def _read_items(input_path: Path, default_type: str) -> List[Tuple[str, str]]:
+    """Reads jobs from a JSONL or plain text file."""
+    items = []
+    with open(input_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            if isinstance(record, dict) and 'prompt' in record:
+                items.append((str(record['prompt']), str(record.get('type', default_type))))
+            else:
+                items.append((line, default_type))
+    return items
+
+
+def main() -> None:
+    """Runs a bulk enhancement job from the command line."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        print("Error: The 'python-dotenv' library is required.")
+        print("Please install it using: pip install python-dotenv")
+        sys.exit(1)
+
+    parser = argparse.ArgumentParser(
+        description="Enhance many prompts in parallel across a pool of API tokens.")
+    parser.add_argument("input", help="JSONL or plain text file with one prompt per line.")
+    parser.add_argument("output", help="JSONL file where results are written in input order.")
+    parser.add_argument("--type", default="General",
+                        help="Prompt type for lines without an explicit type (default: General).")
+    parser.add_argument("--cooldown", type=float, default=10.0,
+                        help="Seconds a throttled token pauses before taking new work (default: 10).")
+    args = parser.parse_args()
+
+    load_dotenv(dotenv_path=PROJECT_DIR / '.env')
+    tokens = [t for t in os.getenv("API_TOKENS", "").split(",") if t.strip()]
+    if not tokens and os.getenv("API_TOKEN"):
+        tokens = [os.getenv("API_TOKEN")]
+    if not tokens:
+        print("Error: No API tokens found. Set API_TOKENS (comma separated) or API_TOKEN in the .env file.")
+        sys.exit(1)
+
+    with open(PROJECT_DIR / "config" / "prompts.json", 'r', encoding='utf-8') as f:
+        prompts_data = json.load(f).get("prompts", {})
+
+    items = _read_items(Path(args.input), args.type)
+    start = time.perf_counter()
+    results = BulkRunner(tokens, prompts_data, throttle_cooldown=args.cooldown).run(items)
+    elapsed = time.perf_counter() - start
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        for (prompt, prompt_type), result in zip(items, results):
+            f.write(json.dumps({'prompt': prompt, 'type': prompt_type, **result},
+                               ensure_ascii=False) + "\n")
+    succeeded = sum(1 for r in results if r.get('success'))
+    print(f"{succeeded}/{len(results)} prompts enhanced with {len(tokens)} tokens in {elapsed:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
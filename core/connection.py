@@ -0,0 +1,82 @@
+"""
+Connection-level timing for the API client's HTTP session.
+
+The pools mounted through TimedHTTPAdapter create connections that record how
+long DNS, TCP and TLS setup take, per thread, so the client can report
+connection setup separately from server time. This relies on urllib3's
+PoolManager.pool_classes_by_scheme, so urllib3 is a direct dependency.
+"""
+
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+_timing = threading.local()
+
+
+def reset_connect_time() -> None:
+    """Resets the connection setup time recorded for the current thread."""
+    _timing.connect_time = 0.0
+    _timing.new_connections = 0
+
+
+def get_connect_time() -> float:
+    """Returns the seconds spent opening connections (DNS, TCP, TLS) in the current thread."""
+    return getattr(_timing, 'connect_time', 0.0)
+
+
+def get_new_connections() -> int:
+    """Returns how many connections were opened in the current thread since the last reset."""
+    return getattr(_timing, 'new_connections', 0)
+
+
+def _record_connect(started: float) -> None:
+    """Adds one connection setup, started at the given perf_counter time, to the thread's totals."""
+    _timing.connect_time = get_connect_time() + (time.perf_counter() - started)
+    _timing.new_connections = get_new_connections() + 1
+
+
+class TimedHTTPConnection(HTTPConnection):
+    """HTTP connection that records how long connection setup takes."""
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(started)
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    """HTTPS connection that records how long DNS, TCP and TLS setup take."""
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        try:
+            super().connect()
+        finally:
+            _record_connect(started)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP connection pool that creates TimedHTTPConnection instances."""
+
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS connection pool that creates TimedHTTPSConnection instances."""
+
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools time connection setup separately from requests."""
+
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
@@ -0,0 +1,147 @@
+import threading
+from typing import Dict, List, Optional, Tuple
+
+# Approximate per-message overhead of the chat format (role, separators).
+MESSAGE_OVERHEAD_TOKENS = 4
+REFINE_PREFIX = "Refine your previous result according to these instructions:\n"
+SUMMARY_HEADER = "Earlier rounds (condensed):\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the token count of a text without a tokenizer.
+
+    Uses the usual ~4 characters per token for English text, but never
+    less than one token per word so short, punctuated text is not undercounted.
+    """
+    if not text:
+        return 0
+    return max((len(text) + 3) // 4, len(text.split()))
+
+
+def estimate_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Estimates the prompt tokens of a list of chat messages."""
+    return sum(estimate_tokens(m['content']) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+class ConversationContext:
+    """Per-category conversation kept as model context for refinement rounds.
+
+    Turns are packed newest first into the token budget. Turns that no longer
+    fit are folded into a short condensed note so the model keeps the gist of
+    earlier rounds without the full text being resent.
+
+    The context is shared between the Tk thread and the request worker, so
+    every mutation holds a lock. reset() bumps the generation so a round that
+    was in flight when the history was cleared is not added back.
+    """
+
+    def __init__(self, token_budget: int = 3000, summary_chars: int = 240) -> None:
+        """Initializes the context.
+
+        Args:
+            token_budget: Maximum estimated prompt tokens per request.
+            summary_chars: Characters kept from each turn folded into the summary.
+        """
+        self.token_budget = token_budget
+        self.summary_chars = summary_chars
+        self.turns: List[Tuple[str, str, int]] = []
+        self.summary: str = ""
+        self.generation: int = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self) -> bool:
+        return bool(self.turns or self.summary)
+
+    def reset(self) -> None:
+        """Forgets all previous turns."""
+        with self._lock:
+            self.turns.clear()
+            self.summary = ""
+            self.generation += 1
+
+    def add_turn(self, user_message: str, assistant_message: str, generation: Optional[int] = None) -> bool:
+        """Records a completed round; token estimates are computed once here.
+
+        Args:
+            user_message: The user message that was sent.
+            assistant_message: The model's reply.
+            generation: The generation returned by pack(); the round is
+                discarded if the context was reset since then.
+
+        Returns:
+            True if the round was recorded, False if it was stale.
+        """
+        user_entry = ('user', user_message, estimate_tokens(user_message) + MESSAGE_OVERHEAD_TOKENS)
+        assistant_entry = ('assistant', assistant_message,
+                           estimate_tokens(assistant_message) + MESSAGE_OVERHEAD_TOKENS)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self.turns.append(user_entry)
+            self.turns.append(assistant_entry)
+            return True
+
+    def _condense(self, turns: List[Tuple[str, str, int]]) -> str:
+        """Builds a compact note from turns that were dropped from the window."""
+        lines = []
+        for role, content, _ in turns:
+            if content.startswith(REFINE_PREFIX):
+                content = content[len(REFINE_PREFIX):]
+            snippet = " ".join(content.split())
+            if len(snippet) > self.summary_chars:
+                snippet = snippet[:self.summary_chars].rstrip() + "..."
+            lines.append(f"- {role}: {snippet}")
+        return "\n".join(lines)
+
+    def pack(self, system_prompt: str, user_message: str) -> Tuple[List[Dict[str, str]], int]:
+        """Builds the messages for the next request within the token budget.
+
+        The system prompt is always sent first and unchanged so the stable
+        prefix is identical across rounds. Older turns are trimmed in pairs and
+        condensed into the summary when the budget is exceeded; the latest
+        round is always kept since it holds the result being refined.
+
+        Returns:
+            The messages and the context generation to pass to add_turn().
+        """
+        with self._lock:
+            return self._pack(system_prompt, user_message), self.generation
+
+    def _pack(self, system_prompt: str, user_message: str) -> List[Dict[str, str]]:
+        """Builds the messages; the caller holds the lock."""
+        if self.turns:
+            user_message = REFINE_PREFIX + user_message
+        fixed = (estimate_tokens(system_prompt) + estimate_tokens(user_message)
+                 + 2 * MESSAGE_OVERHEAD_TOKENS)
+        available = self.token_budget - fixed
+
+        kept_tokens = 0
+        start = len(self.turns)
+        while start >= 2:
+            pair_tokens = self.turns[start - 2][2] + self.turns[start - 1][2]
+            summary_tokens = (estimate_tokens(SUMMARY_HEADER + self.summary) + MESSAGE_OVERHEAD_TOKENS
+                              if self.summary else 0)
+            if kept_tokens and kept_tokens + pair_tokens + summary_tokens > available:
+                break
+            kept_tokens += pair_tokens
+            start -= 2
+
+        if start > 0:
+            dropped = self._condense(self.turns[:start])
+            self.summary = f"{self.summary}\n{dropped}" if self.summary else dropped
+            del self.turns[:start]
+            summary_room = (available - kept_tokens - MESSAGE_OVERHEAD_TOKENS
+                            - estimate_tokens(SUMMARY_HEADER))
+            max_summary_chars = max(0, summary_room) * 4
+            if len(self.summary) > max_summary_chars:
+                # Keep the most recent lines; older condensed rounds go first.
+                trimmed = self.summary[-max_summary_chars:] if max_summary_chars else ""
+                self.summary = trimmed.partition("\n")[2] if "\n" in trimmed else trimmed
+
+        messages = [{'role': 'system', 'content': system_prompt}]
+        if self.summary:
+            messages.append(
+                {'role': 'system', 'content': SUMMARY_HEADER + self.summary})
+        messages.extend({'role': role, 'content': content} for role, content, _ in self.turns)
+        messages.append({'role': 'user', 'content': user_message})
+        return messages
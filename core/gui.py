@@ -5,8 +5,10 @@ from typing import Dict, Any
 from datetime import datetime
 import sys
 
-from config.config_manager import ConfigManager
+from config.config_manager import ConfigManager, ConfigSnapshot
 from core.api_client import SecureAPIClient
+from core.context import ConversationContext
+from core.ui_monitor import UIMonitor
 
 class PromptEnhancerGUI:
     """Modern GUI whose interface is dynamically generated from a prompts file."""
@@ -28,16 +30,20 @@ class PromptEnhancerGUI:
 
         self.root = tk.Tk()
         self.root.title("AI Prompt Enhancer v2.5.0")
-        width = config.getint('APP', 'window_width', 900)
-        height = config.getint('APP', 'window_height', 700)
-        self.root.geometry(f"{width}x{height}")
+        settings = config.snapshot
+        self.root.geometry(f"{settings.window_width}x{settings.window_height}")
         self.root.state('zoomed')
         self.root.minsize(600, 500)
 
+        self.ui_monitor = UIMonitor(
+            self.root, logger, slow_threshold_ms=settings.ui_lag_threshold_ms)
+        if settings.ui_monitor:
+            self.ui_monitor.install()
+
         self.setup_styles()
 
         self.status_var = tk.StringVar(value="Ready")
-        self.history_limit = config.getint('APP', 'max_history', 100)
+        self.history_limit = settings.max_history
 
         self.prompt_types = list(self.prompts_data.keys())
         self.selected_type = tk.StringVar(value=self.prompt_types[0])
@@ -46,17 +52,44 @@ class PromptEnhancerGUI:
         self.prompt_histories = {pt: [] for pt in self.prompt_types}
         self.last_enhanced_prompts = {
             pt: "" for pt in self.prompt_types}
+        self.refine_mode = tk.BooleanVar(value=False)
+        self.refinement_contexts = {
+            pt: ConversationContext(self.api_client.context_token_budget) for pt in self.prompt_types}
 
         self.create_menu()
         self.create_widgets()
         self.setup_event_handlers()
 
+        self.executor_workers = self.api_client.max_workers
         self.executor = ThreadPoolExecutor(
-            max_workers=2, thread_name_prefix="PromptEnhancer")
+            max_workers=self.executor_workers, thread_name_prefix="PromptEnhancer")
+        self.executor.submit(self.api_client.warm_up)
+        self.api_client.start_keepalive()
+        config.subscribe(self._on_config_change)
+        config.start_watching()
         self.logger.info(
             "Application initialized. Prompts loaded from JSON.")
         self.on_type_change()
 
+    def _on_config_change(self, snapshot: ConfigSnapshot) -> None:
+        """Receives config snapshots from the watcher thread and applies them on the Tk thread."""
+        self.root.after(0, self._apply_config, snapshot)
+
+    def _apply_config(self, snapshot: ConfigSnapshot) -> None:
+        """Applies the settings of a new config snapshot that can change at runtime."""
+        self.history_limit = snapshot.max_history
+        self.ui_monitor.slow_threshold = snapshot.ui_lag_threshold_ms / 1000
+        for context in self.refinement_contexts.values():
+            context.token_budget = snapshot.context_token_budget
+        if snapshot.max_workers != self.executor_workers:
+            old_executor = self.executor
+            self.executor_workers = snapshot.max_workers
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.executor_workers, thread_name_prefix="PromptEnhancer")
+            old_executor.shutdown(wait=False)
+        self.api_client.start_keepalive()
+        self.logger.info("Configuration changes applied.")
+
     def setup_styles(self) -> None:
         """Sets up the styles for the GUI."""
         style = ttk.Style(self.root)
@@ -86,6 +119,8 @@ class PromptEnhancerGUI:
         file_menu.add_command(label="Exit", command=self.on_closing)
         menubar.add_cascade(label="File", menu=file_menu)
         help_menu = tk.Menu(menubar, tearoff=0)
+        help_menu.add_command(
+            label="UI Performance", command=self.show_ui_monitor_window)
         help_menu.add_command(label="About", command=self.show_help)
         menubar.add_cascade(label="Help", menu=help_menu)
 
@@ -125,6 +160,10 @@ class PromptEnhancerGUI:
             btn_frame, text="Enhance Prompt", command=self.enhance_prompt, style='Primary.TButton')
         self.enhance_btn.grid(row=0, column=0, padx=(10, 5), pady=5)
 
+        self.refine_check = ttk.Checkbutton(
+            btn_frame, text="Refine last result", variable=self.refine_mode, state=tk.DISABLED)
+        self.refine_check.grid(row=1, column=0, columnspan=3, pady=(5, 0))
+
         self.copy_btn = ttk.Button(
             btn_frame, text="Copy Result", command=self.copy_last_prompt, state=tk.DISABLED)
         self.copy_btn.grid(row=0, column=1, padx=5, pady=5)
@@ -135,7 +174,7 @@ class PromptEnhancerGUI:
 
         close_btn = ttk.Button(
             btn_frame, text="Close", command=self.on_closing)
-        close_btn.grid(row=1, column=0, columnspan=3, pady=(5, 0))
+        close_btn.grid(row=2, column=0, columnspan=3, pady=(5, 0))
 
     def create_chat_frame(self, parent: ttk.Frame) -> None:
         """Creates the chat frame with the conversation history."""
@@ -193,19 +232,29 @@ class PromptEnhancerGUI:
         self.display_history_for_type(current_type)
         self.copy_btn.config(
             state=tk.NORMAL if self.last_enhanced_prompts[current_type] else tk.DISABLED)
+        self._update_refine_state(current_type)
         self.status_var.set(f"Category '{current_type}' active. Ready.")
 
+    def _update_refine_state(self, prompt_type: str) -> None:
+        """Enables refinement only when the category has a previous result."""
+        if self.refinement_contexts[prompt_type]:
+            self.refine_check.config(state=tk.NORMAL)
+        else:
+            self.refine_mode.set(False)
+            self.refine_check.config(state=tk.DISABLED)
+
     def display_history_for_type(self, prompt_type: str) -> None:
         """Displays the history for the given prompt type."""
-        self.chat_history.config(state=tk.NORMAL)
-        self.chat_history.delete('1.0', tk.END)
-        conversation_log = self.conversations.get(prompt_type, [])
-        for timestamp, message, tag, add_ts in conversation_log:
-            self.chat_history.insert(
-                tk.END, f"[{timestamp}] " if add_ts else "", "timestamp")
-            self.chat_history.insert(tk.END, f"{message}\n\n", tag)
-        self.chat_history.config(state=tk.DISABLED)
-        self.chat_history.see(tk.END)
+        with self.ui_monitor.measure("display_history_for_type"):
+            self.chat_history.config(state=tk.NORMAL)
+            self.chat_history.delete('1.0', tk.END)
+            conversation_log = self.conversations.get(prompt_type, [])
+            for timestamp, message, tag, add_ts in conversation_log:
+                self.chat_history.insert(
+                    tk.END, f"[{timestamp}] " if add_ts else "", "timestamp")
+                self.chat_history.insert(tk.END, f"{message}\n\n", tag)
+            self.chat_history.config(state=tk.DISABLED)
+            self.chat_history.see(tk.END)
 
     def update_chat_history(self, message: str, tag: str, add_timestamp: bool = True) -> None:
         """Updates the chat history with a new message."""
@@ -232,18 +281,27 @@ class PromptEnhancerGUI:
                 "Input Required", "Please enter a prompt to enhance.", parent=self.root)
             return
         current_type = self.selected_type.get()
+        refining = self.refine_mode.get()
+        context = self.refinement_contexts[current_type]
+        if not refining:
+            context.reset()
         self.enhance_btn.config(state=tk.DISABLED)
         self.copy_btn.config(state=tk.DISABLED)
-        self.status_var.set(f"Enhancing '{current_type}' prompt...")
+        self.refine_check.config(state=tk.DISABLED)
+        self.status_var.set(
+            f"{'Refining' if refining else 'Enhancing'} '{current_type}' prompt...")
         self.progress_bar.pack(side=tk.RIGHT, padx=(0, 5))
         self.progress_bar.start(10)
-        self.update_chat_history(f"Original Prompt: {user_prompt}", "user")
+        self.update_chat_history(
+            f"{'Refinement' if refining else 'Original Prompt'}: {user_prompt}", "user")
         self.executor.submit(self._enhance_prompt_worker,
-                             user_prompt, self.api_token, current_type)
+                             user_prompt, self.api_token, current_type, context)
 
-    def _enhance_prompt_worker(self, prompt: str, token: str, prompt_type: str) -> None:
+    def _enhance_prompt_worker(self, prompt: str, token: str, prompt_type: str,
+                               context: ConversationContext) -> None:
         """Worker thread for enhancing the prompt."""
-        result = self.api_client.enhance_prompt(prompt, token, prompt_type)
+        result = self.api_client.enhance_prompt(
+            prompt, token, prompt_type, context)
         self.root.after(0, self._handle_enhancement_result,
                         result, prompt_type)
 
@@ -264,6 +322,7 @@ class PromptEnhancerGUI:
         self.enhance_btn.config(state=tk.NORMAL)
         current_type_on_gui = self.selected_type.get()
         is_still_on_same_type = (current_type_on_gui == prompt_type)
+        self._update_refine_state(current_type_on_gui)
         if result.get('success'):
             enhanced_prompt = result['enhanced_prompt']
             self.last_enhanced_prompts[prompt_type] = enhanced_prompt
@@ -299,6 +358,8 @@ class PromptEnhancerGUI:
             self.conversations[current_type].clear()
             self.prompt_histories[current_type].clear()
             self.last_enhanced_prompts[current_type] = ""
+            self.refinement_contexts[current_type].reset()
+            self._update_refine_state(current_type)
             self.display_history_for_type(current_type)
             self.copy_btn.config(state=tk.DISABLED)
             self.status_var.set(f"History for '{current_type}' cleared.")
@@ -335,13 +396,14 @@ class PromptEnhancerGUI:
             messagebox.showwarning(
                 "Empty Export", "There is no history to export in this category.", parent=self.root)
             return
-        content = "\n\n".join(
-            [f"[{ts}] {msg}" if add_ts else msg for ts, msg, _, add_ts in conversation_log])
+        with self.ui_monitor.measure("export_history.build_content"):
+            content = "\n\n".join(
+                [f"[{ts}] {msg}" if add_ts else msg for ts, msg, _, add_ts in conversation_log])
         filename = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[
             ("Text Files", "*.txt"), ("Markdown Files", "*.md")], title=f"Export History for '{current_type}'", parent=self.root)
         if filename:
             try:
-                with open(filename, 'w', encoding='utf-8') as f:
+                with self.ui_monitor.measure("export_history.write_file"), open(filename, 'w', encoding='utf-8') as f:
                     f.write(content)
                 self.status_var.set(f"History exported to {filename}")
             except Exception as e:
@@ -367,9 +429,10 @@ class PromptEnhancerGUI:
         scrollbar = ttk.Scrollbar(
             history_win, orient=tk.VERTICAL, command=listbox.yview)
         listbox.config(yscrollcommand=scrollbar.set)
-        for prompt in current_history:
-            listbox.insert(tk.END, " " + prompt.replace('\n',
-                                                         ' ').strip()[:80] + '...')
+        with self.ui_monitor.measure("show_history_window.fill_listbox"):
+            for prompt in current_history:
+                listbox.insert(tk.END, " " + prompt.replace('\n',
+                                                             ' ').strip()[:80] + '...')
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         btn_frame = ttk.Frame(history_win, padding="10")
@@ -398,6 +461,40 @@ class PromptEnhancerGUI:
         listbox.bind("<<ListboxSelect>>", on_select)
         self.root.wait_window(history_win)
 
+    def show_ui_monitor_window(self) -> None:
+        """Shows a debug panel with event-loop lag and the slowest UI callbacks."""
+        if not self.ui_monitor.enabled:
+            messagebox.showinfo(
+                "UI Performance", "The UI monitor is disabled.\n\nSet 'ui_monitor = true' in the [APP] section of config.ini and restart.", parent=self.root)
+            return
+        monitor_win = tk.Toplevel(self.root)
+        monitor_win.title("UI Performance")
+        monitor_win.geometry("700x450")
+        monitor_win.transient(self.root)
+        report_text = scrolledtext.ScrolledText(
+            monitor_win, wrap=tk.NONE, font=('Courier New', 9), relief=tk.SOLID, borderwidth=1)
+        report_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=(10, 0))
+
+        def refresh():
+            report_text.config(state=tk.NORMAL)
+            report_text.delete('1.0', tk.END)
+            report_text.insert('1.0', self.ui_monitor.report())
+            report_text.config(state=tk.DISABLED)
+
+        def reset():
+            self.ui_monitor.reset()
+            refresh()
+
+        btn_frame = ttk.Frame(monitor_win, padding="10")
+        btn_frame.pack(fill=tk.X)
+        ttk.Button(btn_frame, text="Refresh", command=refresh).pack(
+            side=tk.LEFT, expand=True, padx=5)
+        ttk.Button(btn_frame, text="Reset", command=reset).pack(
+            side=tk.LEFT, expand=True, padx=5)
+        ttk.Button(btn_frame, text="Close", command=monitor_win.destroy).pack(
+            side=tk.LEFT, expand=True, padx=5)
+        refresh()
+
     def show_help(self) -> None:
         """Shows the about dialog."""
         messagebox.showinfo(
@@ -406,6 +503,11 @@ class PromptEnhancerGUI:
     def on_closing(self) -> None:
         """Handles the closing of the application."""
         if messagebox.askokcancel("Exit", "Do you want to exit the application?", parent=self.root, icon='question'):
+            self.api_client.stop_keepalive()
+            self.config.stop_watching()
+            if self.ui_monitor.enabled:
+                self.logger.info(f"UI monitor summary:\n{self.ui_monitor.report()}")
+                self.ui_monitor.uninstall()
             self.executor.shutdown(wait=False, cancel_futures=True)
             self.root.destroy()
 
@@ -0,0 +1,194 @@
+import time
+import tkinter as tk
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+
+def _callback_name(func: Callable) -> str:
+    """Builds a readable name for a Tk callback, including lambdas."""
+    target = getattr(func, '__func__', func)
+    code = getattr(target, '__code__', None)
+    # after() wraps the scheduled function in a local 'callit' closure.
+    if code is not None and code.co_name == 'callit' and 'func' in code.co_freevars:
+        inner = target.__closure__[code.co_freevars.index('func')].cell_contents
+        return _callback_name(inner)
+    name = getattr(target, '__qualname__', None) or repr(target)
+    if code is not None and '<lambda>' in name:
+        name = f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+    return name
+
+
+class _TimedCallWrapper(tk.CallWrapper):
+    """CallWrapper that reports how long each Tk callback runs on the main thread."""
+
+    monitor: Optional["UIMonitor"] = None
+
+    def __call__(self, *args):
+        monitor = _TimedCallWrapper.monitor
+        if monitor is None:
+            return super().__call__(*args)
+        started = time.perf_counter()
+        beats = monitor.beats
+        try:
+            return super().__call__(*args)
+        finally:
+            monitor.record(_callback_name(self.func),
+                           time.perf_counter() - started, beats)
+
+
+class UIMonitor:
+    """Measures Tk event-loop lag and the time spent in UI callbacks.
+
+    A periodic after() heartbeat measures how late the event loop services
+    it, and every callback Tk dispatches (commands, bindings, after jobs) is
+    timed by swapping tkinter's CallWrapper. Callbacks that keep the event
+    loop running while open dialogs wait for the user are not counted.
+    """
+
+    def __init__(self, root: tk.Tk, logger, interval_ms: int = 100, slow_threshold_ms: int = 100,
+                 history_size: int = 200) -> None:
+        """Initializes the monitor.
+
+        Args:
+            root: The application's root window.
+            logger: The application's logger.
+            interval_ms: Heartbeat period in milliseconds.
+            slow_threshold_ms: Callbacks and lag above this are logged as warnings.
+            history_size: Number of recent slow events kept for the debug panel.
+        """
+        self.root = root
+        self.logger = logger
+        self.interval_ms = max(10, interval_ms)
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.enabled = False
+        self.callback_stats: Dict[str, List[float]] = {}
+        self.slow_events: Deque[Tuple[str, str, float]] = deque(maxlen=history_size)
+        self.lag_samples: Deque[float] = deque(maxlen=history_size)
+        self.max_lag: float = 0.0
+        self.beats: int = 0
+        self._expected: float = 0.0
+        self._after_id: Optional[str] = None
+        self._original_wrapper = tk.CallWrapper
+
+    def install(self) -> None:
+        """Starts timing callbacks and the heartbeat.
+
+        Only callbacks registered after this call are timed, so it should run
+        before the widgets are created.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        _TimedCallWrapper.monitor = self
+        tk.CallWrapper = _TimedCallWrapper
+        self._expected = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+        self.logger.info(
+            f"UI monitor enabled (heartbeat={self.interval_ms}ms, threshold={self.slow_threshold * 1000:.0f}ms)")
+
+    def uninstall(self) -> None:
+        """Stops the heartbeat and restores tkinter's CallWrapper."""
+        if not self.enabled:
+            return
+        self.enabled = False
+        _TimedCallWrapper.monitor = None
+        tk.CallWrapper = self._original_wrapper
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _heartbeat(self) -> None:
+        """Measures how late the event loop ran this heartbeat and reschedules it."""
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        self.beats += 1
+        self.lag_samples.append(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.slow_threshold:
+            self._add_slow_event('lag', 'event loop', lag)
+        if self.enabled:
+            self._expected = now + self.interval_ms / 1000
+            self._after_id = self.root.after(self.interval_ms, self._heartbeat)
+
+    def record(self, name: str, duration: float, beats_at_start: Optional[int] = None) -> None:
+        """Records the duration of one UI callback or measured section.
+
+        If the heartbeat fired while the callback ran, the callback was pumping
+        a nested event loop (a dialog, wait_window) rather than blocking the
+        main thread, so it is not recorded.
+        """
+        if name.endswith('UIMonitor._heartbeat'):
+            return
+        if beats_at_start is not None and self.beats != beats_at_start:
+            return
+        stats = self.callback_stats.get(name)
+        if stats is None:
+            # [calls, total seconds, max seconds]
+            stats = self.callback_stats[name] = [0, 0.0, 0.0]
+        stats[0] += 1
+        stats[1] += duration
+        stats[2] = max(stats[2], duration)
+        if duration > self.slow_threshold:
+            self._add_slow_event('callback', name, duration)
+
+    @contextmanager
+    def measure(self, name: str) -> Iterator[None]:
+        """Times a section of code that runs on the Tk main thread."""
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        beats = self.beats
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started, beats)
+
+    def _add_slow_event(self, kind: str, name: str, duration: float) -> None:
+        self.slow_events.append(
+            (time.strftime('%H:%M:%S'), f"{kind}: {name}", duration))
+        self.logger.warning(
+            f"UI {kind} '{name}' blocked the main thread for {duration * 1000:.0f}ms")
+
+    def slowest_callbacks(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Returns the callbacks with the highest worst-case duration."""
+        rows = [{'name': name, 'calls': calls, 'total': total, 'max': worst, 'mean': total / calls}
+                for name, (calls, total, worst) in self.callback_stats.items()]
+        rows.sort(key=lambda row: row['max'], reverse=True)
+        return rows[:limit]
+
+    def lag_summary(self) -> Dict[str, float]:
+        """Returns event-loop lag statistics in seconds."""
+        samples = sorted(self.lag_samples)
+        if not samples:
+            return {'beats': self.beats, 'max': 0.0, 'p95': 0.0, 'mean': 0.0}
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return {'beats': self.beats, 'max': self.max_lag, 'p95': p95,
+                'mean': sum(samples) / len(samples)}
+
+    def reset(self) -> None:
+        """Clears all collected statistics."""
+        self.callback_stats.clear()
+        self.slow_events.clear()
+        self.lag_samples.clear()
+        self.max_lag = 0.0
+        self.beats = 0
+
+    def report(self, limit: int = 15) -> str:
+        """Formats the collected statistics as plain text."""
+        lag = self.lag_summary()
+        lines = [f"Event-loop lag ({lag['beats']} heartbeats every {self.interval_ms}ms): "
+                 f"max={lag['max'] * 1000:.0f}ms p95={lag['p95'] * 1000:.0f}ms mean={lag['mean'] * 1000:.1f}ms",
+                 "", f"Slowest callbacks (top {limit}):",
+                 f"{'max ms':>8} {'mean ms':>8} {'calls':>6}  name"]
+        for row in self.slowest_callbacks(limit):
+            lines.append(f"{row['max'] * 1000:>8.1f} {row['mean'] * 1000:>8.1f} {row['calls']:>6}  {row['name']}")
+        lines += ["", f"Recent events over {self.slow_threshold * 1000:.0f}ms:"]
+        for timestamp, name, duration in reversed(self.slow_events):
+            lines.append(f"[{timestamp}] {duration * 1000:>7.0f}ms  {name}")
+        return "\n".join(lines)
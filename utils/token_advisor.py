@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Suggests tighter per-category max_tokens values for prompts.json.
+
+Reads the "Completion usage" lines written by SecureAPIClient to the log files
+and proposes a ceiling per category based on the observed output lengths.
+
+Usage:
+    python -m utils.token_advisor [logs_dir] [--percentile 95] [--headroom 1.2]
+"""
+
+import argparse
+import json
+import math
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+USAGE_PATTERN = re.compile(
+    r"Completion usage for '(?P<type>.+?)': (?P<tokens>\d+) tokens \(max_tokens=(?P<max>\d+)\)")
+
+
+class TokenAdvisor:
+    """Collects observed completion lengths and suggests max_tokens ceilings."""
+
+    def __init__(self, percentile: float = 95.0, headroom: float = 1.2, round_to: int = 50, min_samples: int = 5) -> None:
+        """Initializes the advisor.
+
+        Args:
+            percentile: The percentile of observed lengths the ceiling must cover.
+            headroom: Multiplier applied on top of the percentile.
+            round_to: The suggestion is rounded up to a multiple of this value.
+            min_samples: Categories with fewer samples get no suggestion.
+        """
+        self.percentile = percentile
+        self.headroom = headroom
+        self.round_to = round_to
+        self.min_samples = min_samples
+        self.samples: Dict[str, List[int]] = {}
+        self.current_limits: Dict[str, int] = {}
+
+    def add_sample(self, prompt_type: str, completion_tokens: int, max_tokens: Optional[int] = None) -> None:
+        """Records one observed completion length."""
+        self.samples.setdefault(prompt_type, []).append(completion_tokens)
+        if max_tokens is not None:
+            self.current_limits[prompt_type] = max_tokens
+
+    def load_log_lines(self, lines: Iterable[str]) -> int:
+        """Parses log lines and records every usage entry found.
+
+        Returns:
+            The number of samples recorded.
+        """
+        count = 0
+        for line in lines:
+            match = USAGE_PATTERN.search(line)
+            if match:
+                self.add_sample(match.group('type'), int(match.group('tokens')),
+                                int(match.group('max')))
+                count += 1
+        return count
+
+    def load_logs(self, logs_dir: Path) -> int:
+        """Parses every *.log file in the given directory."""
+        count = 0
+        for log_file in sorted(Path(logs_dir).glob("*.log")):
+            with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+                count += self.load_log_lines(f)
+        return count
+
+    def _percentile(self, values: List[int]) -> float:
+        """Returns the configured percentile using nearest-rank."""
+        ordered = sorted(values)
+        rank = max(1, math.ceil(self.percentile / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def suggest(self) -> Dict[str, Dict[str, int]]:
+        """Computes a max_tokens suggestion for each category with enough samples."""
+        suggestions = {}
+        for prompt_type, values in sorted(self.samples.items()):
+            if len(values) < self.min_samples:
+                continue
+            target = self._percentile(values) * self.headroom
+            suggested = int(math.ceil(target / self.round_to) * self.round_to)
+            suggestions[prompt_type] = {
+                'samples': len(values),
+                'observed_max': max(values),
+                'percentile_value': int(self._percentile(values)),
+                'current': self.current_limits.get(prompt_type, 0),
+                'suggested': max(self.round_to, suggested),
+            }
+        return suggestions
+
+
+def main() -> None:
+    """Prints max_tokens suggestions gathered from the application logs."""
+    parser = argparse.ArgumentParser(
+        description="Suggest per-category max_tokens values from observed completion lengths.")
+    parser.add_argument("logs_dir", nargs="?", default="logs",
+                        help="Directory containing the application log files.")
+    parser.add_argument("--percentile", type=float, default=95.0,
+                        help="Percentile of observed lengths to cover (default: 95).")
+    parser.add_argument("--headroom", type=float, default=1.2,
+                        help="Multiplier applied on top of the percentile (default: 1.2).")
+    parser.add_argument("--min-samples", type=int, default=5,
+                        help="Minimum samples required per category (default: 5).")
+    parser.add_argument("--json", action="store_true",
+                        help="Print the suggestions as JSON.")
+    args = parser.parse_args()
+
+    advisor = TokenAdvisor(percentile=args.percentile,
+                           headroom=args.headroom, min_samples=args.min_samples)
+    if not advisor.load_logs(Path(args.logs_dir)):
+        print(f"No completion usage entries found in '{args.logs_dir}'.")
+        return
+    suggestions = advisor.suggest()
+    if args.json:
+        print(json.dumps(suggestions, indent=2))
+        return
+    if not suggestions:
+        print("Not enough samples yet to suggest any values.")
+        return
+    print(f"{'Category':<22}{'Samples':>8}{'Max seen':>10}{'P' + str(int(args.percentile)):>8}{'Current':>9}{'Suggested':>11}")
+    for prompt_type, info in suggestions.items():
+        print(f"{prompt_type:<22}{info['samples']:>8}{info['observed_max']:>10}{info['percentile_value']:>8}"
+              f"{info['current']:>9}{info['suggested']:>11}")
+
+
+if __name__ == "__main__":
+    main()